@@ -0,0 +1,65 @@
+"""
+Import-time benchmark guarding the cold start of REST-only workers
+
+Each run imports ftx in a fresh interpreter, creates a client and checks that
+neither the websocket stack, ciso8601 nor numpy got loaded. Exits with status
+1 when a lazily loaded module is imported eagerly or the import exceeds the
+budget.
+
+    python benchmark/import_time.py --budget-ms 300
+"""
+import argparse
+import json
+import subprocess
+import sys
+from os.path import dirname, abspath
+
+ROOT = dirname(dirname(abspath(__file__)))
+
+LAZY_MODULES = ['ftx.wsapi', 'ftx.hedge', 'websockets', 'asyncio', 'numpy',
+                'ciso8601']
+
+PROBE = f"""
+import json, sys, time
+start = time.perf_counter()
+import ftx
+ftx.FtxClient()
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    'ms': elapsed * 1000,
+    'loaded': [m for m in {LAZY_MODULES!r} if m in sys.modules],
+}}))
+"""
+
+
+def run_probe() -> dict:
+    output = subprocess.check_output([sys.executable, '-c', PROBE], cwd=ROOT)
+    return json.loads(output)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--budget-ms', type=float, default=300.0,
+                        help='maximum median cold import time')
+    args = parser.parse_args()
+
+    results = [run_probe() for _ in range(args.runs)]
+    times = sorted(r['ms'] for r in results)
+    median = times[len(times) // 2]
+    loaded = sorted({m for r in results for m in r['loaded']})
+    print(f'import ftx + FtxClient(): min {times[0]:.1f}ms, '
+          f'median {median:.1f}ms over {args.runs} runs')
+
+    failed = False
+    if loaded:
+        print('eagerly imported:', ', '.join(loaded))
+        failed = True
+    if median > args.budget_ms:
+        print(f'median exceeds the {args.budget_ms:.0f}ms budget')
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1 +1,34 @@
-from ftx.api import FtxClient
\ No newline at end of file
+"""
+Unofficial python3 FTX exchange API
+
+The public API is loaded lazily, so importing ``ftx`` for REST calls does not
+pull in the websocket stack.
+"""
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from ftx.api import FtxClient
+    from ftx.orderbook import OrderBook
+    from ftx.wsapi import FtxWebSocketClient
+
+_exports = {
+    'FtxClient': 'ftx.api',
+    'FtxWebSocketClient': 'ftx.wsapi',
+    'OrderBook': 'ftx.orderbook',
+}
+
+__all__ = list(_exports)
+
+
+def __getattr__(name):
+    module = _exports.get(name)
+    if module is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -1,12 +1,15 @@
 import hmac
 import time
 import urllib.parse
-from typing import Optional, Dict, Any, List
+from fnmatch import fnmatch
+from typing import Optional, Dict, Any, List, TYPE_CHECKING
 
-from ciso8601 import parse_datetime
 from requests import Request, Session, Response
 
-from ftx.wsapi import FtxWebSocketClient
+from ftx.singleflight import SingleFlight
+
+if TYPE_CHECKING:
+    from ftx.wsapi import FtxWebSocketClient
 
 
 class FtxClient:
@@ -16,8 +19,37 @@ class FtxClient:
         api_key: Optional[str] = None,
         api_secret: Optional[str] = None,
         subaccount_name: Optional[str] = None,
-        ws_queue_size: int = 1024
+        ws_queue_size: int = 1024,
+        coalesce_reads: bool = False,
+        coalesce_ttl: float = 0.0,
+        timeout: Optional[float] = None,
+        endpoint_timeouts: Optional[Dict[str, float]] = None,
+        hedge_percentile: Optional[float] = None,
+        hedge_workers: int = 4
     ) -> None:
+        """
+        Create a REST client
+
+        :param base_url: ftx api url
+        :param api_key: api key
+        :param api_secret: api secret
+        :param subaccount_name: subaccount
+        :param ws_queue_size: size for the websocket message queue
+        :param coalesce_reads: set to True to share one request between
+            concurrent identical GETs (same path, params and subaccount)
+        :param coalesce_ttl: seconds to keep reusing a coalesced GET result
+            after it returns, 0 to only share requests in flight
+        :param timeout: default request timeout in seconds, None to wait
+            forever
+        :param endpoint_timeouts: timeouts by fnmatch path pattern, e.g.
+            ``{'markets/*/orderbook': 0.5}``, overriding ``timeout``. ``*``
+            also matches ``/`` and the longest matching pattern wins
+        :param hedge_percentile: latency percentile (0-100) after which
+            idempotent reads send a second request and use the first reply,
+            None to disable hedging, requires a ``timeout``
+        :param hedge_workers: threads available to hedged reads, reads run
+            unhedged on the calling thread while all of them are busy
+        """
         self._session = Session()
         self._base_url = base_url
         self._api_key = api_key
@@ -25,26 +57,82 @@ class FtxClient:
         self._subaccount_name = subaccount_name
         self._ws_client = None
         self._ws_queue_size = ws_queue_size
-
-    def _get(self, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
-        return self._request('GET', path, params=params)
-
-    def _post(self, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
-        return self._request('POST', path, json=params)
+        self._single_flight = SingleFlight(coalesce_ttl) \
+            if coalesce_reads else None
+        self._timeout = timeout
+        self._endpoint_timeouts = endpoint_timeouts or {}
+        self._hedger = None
+        if hedge_percentile is not None:
+            assert timeout is not None, 'hedged reads need a timeout'
+            from ftx.hedge import Hedger
+            self._hedger = Hedger(hedge_percentile, hedge_workers)
+
+    def close(self) -> None:
+        """
+        Close the http session and the hedging thread pool
+        """
+        if self._hedger is not None:
+            self._hedger.close()
+        self._session.close()
+
+    def _get(self,
+             path: str,
+             params: Optional[Dict[str, Any]] = None,
+             timeout: Optional[float] = None,
+             hedge: bool = False) -> Any:
+        if timeout is None:
+            timeout = self._endpoint_timeout(path)
+        if self._single_flight is None:
+            return self._request('GET', path, timeout=timeout, hedge=hedge,
+                                 params=params)
+        key = (path, tuple(sorted((params or {}).items())),
+               self._subaccount_name)
+        return self._single_flight.do(
+            key, lambda: self._request('GET', path, timeout=timeout,
+                                       hedge=hedge, params=params), timeout)
+
+    def _post(self,
+              path: str,
+              params: Optional[Dict[str, Any]] = None,
+              timeout: Optional[float] = None) -> Any:
+        return self._request('POST', path, timeout=timeout, json=params)
 
     def _delete(self,
                 path: str,
-                params: Optional[Dict[str, Any]] = None) -> Any:
-        return self._request('DELETE', path, json=params)
-
-    def _request(self, method: str, path: str, **kwargs) -> Any:
+                params: Optional[Dict[str, Any]] = None,
+                timeout: Optional[float] = None) -> Any:
+        return self._request('DELETE', path, timeout=timeout, json=params)
+
+    def _request(self,
+                 method: str,
+                 path: str,
+                 timeout: Optional[float] = None,
+                 hedge: bool = False,
+                 **kwargs) -> Any:
+        if timeout is None:
+            timeout = self._endpoint_timeout(path)
+        if not hedge or self._hedger is None:
+            return self._send(method, path, timeout, **kwargs)
+        return self._hedger.call(
+            path, lambda remaining: self._send(method, path, remaining,
+                                               **kwargs), timeout)
+
+    def _send(self, method: str, path: str, timeout: Optional[float],
+              **kwargs) -> Any:
         request = Request(method, self._base_url + path, **kwargs)
         if self._api_key:
             self._sign_request(request)
-        response = self._session.send(request.prepare())
+        response = self._session.send(request.prepare(), timeout=timeout)
 
         return self._process_response(response)
 
+    def _endpoint_timeout(self, path: str) -> Optional[float]:
+        matches = [pattern for pattern in self._endpoint_timeouts
+                   if fnmatch(path, pattern)]
+        if not matches:
+            return self._timeout
+        return self._endpoint_timeouts[max(matches, key=len)]
+
     def _sign_request(self, request: Request) -> None:
         ts = int(time.time() * 1000)
         prepared = request.prepare()
@@ -62,13 +150,15 @@ class FtxClient:
                 self._subaccount_name)
 
     @property
-    def websocket(self) -> FtxWebSocketClient:
+    def websocket(self) -> 'FtxWebSocketClient':
         """
-        Lazy FtxWebSocketClient with the same credentials
+        Lazy FtxWebSocketClient with the same credentials, the websocket
+        stack is only imported on first use
 
         :return: FtxWebSocketClient
         """
         if not self._ws_client:
+            from ftx.wsapi import FtxWebSocketClient
             self._ws_client = FtxWebSocketClient(
                 api_key=self._api_key,
                 api_secret=self._api_secret,
@@ -158,6 +248,7 @@ class FtxClient:
         price: Optional[float] = None,
         size: Optional[float] = None,
         client_order_id: Optional[str] = None,
+        timeout: Optional[float] = None,
     ) -> dict:
         assert (existing_order_id is None) ^ (existing_client_order_id is None), \
             'Must supply exactly one ID for the order to modify'
@@ -176,7 +267,7 @@ class FtxClient:
                 **({
                     'clientId': client_order_id
                 } if client_order_id is not None else {}),
-            })
+            }, timeout=timeout)
 
     @authentication_required
     def get_conditional_orders(self,
@@ -194,7 +285,8 @@ class FtxClient:
                     ioc: bool = False,
                     post_only: bool = False,
                     client_id: Optional[str] = None,
-                    reject_on_price_band: Optional[bool] = None) -> dict:
+                    reject_on_price_band: Optional[bool] = None,
+                    timeout: Optional[float] = None) -> dict:
         return self._post(
             'orders', {
                 'market': market,
@@ -207,7 +299,7 @@ class FtxClient:
                 'postOnly': post_only,
                 'clientId': client_id,
                 'rejectOnPriceBand': reject_on_price_band
-            })
+            }, timeout=timeout)
 
     @authentication_required
     def place_conditional_order(self,
@@ -221,6 +313,7 @@ class FtxClient:
                                 orderPrice:    Optional[float] = None,
                                 trail_value: Optional[float] = None,
                                 retry_until_filled: Optional[bool] = None,
+                                timeout: Optional[float] = None,
                                 ) -> dict:
         """
         To send a Stop Market order, set type='stop' and supply a trigger_price
@@ -245,27 +338,32 @@ class FtxClient:
                 'orderPrice': limit_price,
                 'trailValue': trail_value,
                 'retryUntilFilled': retry_until_filled
-            })
+            }, timeout=timeout)
 
     @authentication_required
-    def cancel_order(self, order_id: str) -> dict:
-        return self._delete(f'orders/{order_id}')
+    def cancel_order(self,
+                     order_id: str,
+                     timeout: Optional[float] = None) -> dict:
+        return self._delete(f'orders/{order_id}', timeout=timeout)
 
     @authentication_required
-    def cancel_conditional_order(self, order_id: str) -> dict:
-        return self._delete(f'conditional_orders/{order_id}')
+    def cancel_conditional_order(self,
+                                 order_id: str,
+                                 timeout: Optional[float] = None) -> dict:
+        return self._delete(f'conditional_orders/{order_id}', timeout=timeout)
 
     @authentication_required
     def cancel_orders(self,
                       market_name: Optional[str] = None,
                       conditional_orders: bool = False,
-                      limit_orders: bool = False) -> dict:
+                      limit_orders: bool = False,
+                      timeout: Optional[float] = None) -> dict:
         return self._delete(
             'orders', {
                 'market': market_name,
                 'conditionalOrdersOnly': conditional_orders,
                 'limitOrdersOnly': limit_orders,
-            })
+            }, timeout=timeout)
 
     @authentication_required
     def get_lending_rates(self) -> dict:
@@ -308,8 +406,11 @@ class FtxClient:
         return self._get(f'wallet/deposit_address/{ticker}{method}')
 
     @authentication_required
-    def get_positions(self, show_avg_price: bool = False) -> List[dict]:
-        return self._get('positions', {'showAvgPrice': show_avg_price})
+    def get_positions(self,
+                      show_avg_price: bool = False,
+                      timeout: Optional[float] = None) -> List[dict]:
+        return self._get('positions', {'showAvgPrice': show_avg_price},
+                         timeout=timeout, hedge=True)
 
     @authentication_required
     def get_position(self, name: str, show_avg_price: bool = False) -> dict:
@@ -393,11 +494,15 @@ class FtxClient:
     def get_markets(self) -> List[dict]:
         return self._get('markets')
 
-    def get_market(self, market: str) -> dict:
-        return self._get(f'markets/{market}')
+    def get_market(self, market: str, timeout: Optional[float] = None) -> dict:
+        return self._get(f'markets/{market}', timeout=timeout, hedge=True)
 
-    def get_orderbook(self, market: str, depth: Optional[int] = None) -> dict:
-        return self._get(f'markets/{market}/orderbook', {'depth': depth})
+    def get_orderbook(self,
+                      market: str,
+                      depth: Optional[int] = None,
+                      timeout: Optional[float] = None) -> dict:
+        return self._get(f'markets/{market}/orderbook', {'depth': depth},
+                         timeout=timeout, hedge=True)
 
     def get_trades(self,
                    market: str,
@@ -414,6 +519,7 @@ class FtxClient:
                        market: str,
                        start_time: Optional[float] = None,
                        end_time: Optional[float] = None) -> List:
+        from ciso8601 import parse_datetime
         ids = set()
         limit = 100
         results = []
@@ -0,0 +1,153 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import (FIRST_COMPLETED, Future, ThreadPoolExecutor,
+                                wait)
+from typing import Any, Callable, Deque, Dict, Hashable, Optional
+
+from requests.exceptions import Timeout
+
+
+class LatencyTracker:
+    """
+    Rolling latency samples per endpoint, used to decide when to hedge
+    """
+    def __init__(self,
+                 percentile: float,
+                 window: int = 256,
+                 min_samples: int = 20):
+        """
+        :param percentile: latency percentile (0-100) after which to hedge
+        :param window: samples kept per endpoint
+        :param min_samples: samples needed before an endpoint is hedged
+        """
+        assert 0 < percentile < 100, 'percentile must be between 0 and 100'
+        self.percentile = percentile
+        self.window = window
+        self.min_samples = min_samples
+        self._lock = threading.Lock()
+        self._samples: Dict[Hashable, Deque[float]] = {}
+
+    def record(self, key: Hashable, seconds: float) -> None:
+        with self._lock:
+            samples = self._samples.get(key)
+            if samples is None:
+                samples = self._samples[key] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def delay(self, key: Hashable) -> Optional[float]:
+        """
+        The hedge delay for an endpoint, None until enough samples are recorded
+        """
+        with self._lock:
+            samples = sorted(self._samples.get(key, ()))
+        if len(samples) < self.min_samples:
+            return None
+        index = min(int(len(samples) * self.percentile / 100),
+                    len(samples) - 1)
+        return samples[index]
+
+
+class Hedger:
+    """
+    Runs idempotent calls with a hedge on a bounded thread pool
+
+    Attempts only go to the pool while a worker is free, otherwise the call
+    runs on the calling thread without a hedge, so hung attempts on one
+    endpoint can never starve the others.
+    """
+    def __init__(self, percentile: float, max_workers: int = 4):
+        """
+        :param percentile: latency percentile (0-100) after which to hedge
+        :param max_workers: size of the thread pool
+        """
+        self.latency = LatencyTracker(percentile)
+        self.max_workers = max_workers
+        self._slots = threading.BoundedSemaphore(max_workers)
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _submit(self, fn: Callable[[], Any]) -> Optional[Future]:
+        """
+        Run fn on the pool, None if all workers are busy
+        """
+        if not self._slots.acquire(blocking=False):
+            return None
+        try:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        self.max_workers, thread_name_prefix='ftx-hedge')
+                future = self._executor.submit(fn)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def call(self,
+             key: Hashable,
+             fn: Callable[[Optional[float]], Any],
+             timeout: Optional[float] = None) -> Any:
+        """
+        Call fn, and call it a second time if the first call hasn't returned
+        after the latency percentile of ``key``. The first successful result
+        is returned, the slower call is left to finish in the background.
+
+        :param key: the endpoint, latencies are tracked per key
+        :param fn: the call, receives the seconds left until the deadline
+        :param timeout: overall deadline in seconds, None to wait forever
+        :return: the result of the first successful call
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        def remaining() -> Optional[float]:
+            if deadline is None:
+                return None
+            left = deadline - time.monotonic()
+            if left <= 0:
+                raise Timeout(f'deadline of {timeout}s exceeded')
+            return left
+
+        def attempt() -> Any:
+            start = time.monotonic()
+            result = fn(remaining())
+            self.latency.record(key, time.monotonic() - start)
+            return result
+
+        delay = self.latency.delay(key)
+        first = self._submit(attempt) if delay is not None else None
+        if first is None:
+            return attempt()
+
+        pending = {first}
+        left = remaining()
+        done, _ = wait(pending,
+                       timeout=delay if left is None else min(delay, left))
+        if not done:
+            hedge = self._submit(attempt)
+            if hedge is not None:
+                pending.add(hedge)
+
+        error = None
+        while pending:
+            done, pending = wait(pending,
+                                 timeout=remaining(),
+                                 return_when=FIRST_COMPLETED)
+            if not done:
+                raise Timeout(f'deadline of {timeout}s exceeded')
+            for future in done:
+                try:
+                    return future.result()
+                except Exception as e:
+                    error = e
+        raise error
+
+    def close(self) -> None:
+        """
+        Shut down the thread pool without waiting for attempts in flight
+        """
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
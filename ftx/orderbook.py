@@ -0,0 +1,247 @@
+import math
+from bisect import bisect_left
+from itertools import accumulate
+from typing import Dict, List, Optional, Sequence, Tuple
+
+BIDS = 'bids'
+ASKS = 'asks'
+
+# updates per side after which the running total is re-summed exactly
+REBASE_INTERVAL = 1024
+
+
+class OrderBook:
+    """
+    Order book that keeps its analytics up to date as levels change
+
+    Feed it snapshots from ``FtxClient.get_orderbook`` with ``load()`` or the
+    ``data`` of websocket ``orderbook`` messages with ``apply()``. Updates cost
+    O(changed levels): totals, top of book, imbalance and microprice are
+    maintained directly, cumulative depth is only recomputed from the best
+    changed level down, and only as deep as a query needs.
+
+    Example:
+        ``book.apply(msg['data']); book.microprice()``
+    """
+    def __init__(self, book: Optional[dict] = None):
+        """
+        :param book: optional snapshot with ``bids`` and ``asks`` levels
+        """
+        self.bids: Dict[float, float] = {}
+        self.asks: Dict[float, float] = {}
+        # sort keys per side, best level first: -price for bids, price for asks
+        self._keys: Dict[str, List[float]] = {BIDS: [], ASKS: []}
+        self._totals: Dict[str, float] = {BIDS: 0.0, ASKS: 0.0}
+        self._updates: Dict[str, int] = {BIDS: 0, ASKS: 0}
+        self._cum_size: Dict[str, List[float]] = {BIDS: [], ASKS: []}
+        self._cum_notional: Dict[str, List[float]] = {BIDS: [], ASKS: []}
+        if book is not None:
+            self.load(book)
+
+    def apply(self, data: dict) -> None:
+        """
+        Apply the data of a websocket ``orderbook`` message
+
+        :param data: a ``partial`` or ``update`` message's data
+        """
+        if data.get('action') == 'partial':
+            self.load(data)
+        else:
+            self.update(data)
+
+    def load(self, book: dict) -> None:
+        """
+        Replace the book with a snapshot, recomputing all metrics at once
+
+        :param book: dict with ``bids`` and ``asks`` as [price, size] levels
+        """
+        for side in (BIDS, ASKS):
+            self._load_side(side, book.get(side) or [])
+
+    def update(self, data: dict) -> None:
+        """
+        Apply changed levels, a size of 0 removes the level
+
+        :param data: dict with changed ``bids`` and ``asks`` levels
+        """
+        for side in (BIDS, ASKS):
+            for price, size in data.get(side) or ():
+                self._set_level(side, float(price), float(size))
+
+    def _levels(self, side: str) -> Dict[float, float]:
+        return self.bids if side == BIDS else self.asks
+
+    def _load_side(self, side: str, levels: Sequence[Sequence[float]]) -> None:
+        book = {float(p): float(s) for p, s in levels if float(s) > 0}
+        keys = sorted(-p for p in book) if side == BIDS else sorted(book)
+        prices = [abs(key) for key in keys]
+        cum_size = list(accumulate(book[p] for p in prices))
+        cum_notional = list(accumulate(p * book[p] for p in prices))
+        if side == BIDS:
+            self.bids = book
+        else:
+            self.asks = book
+        self._keys[side] = keys
+        self._cum_size[side] = cum_size
+        self._cum_notional[side] = cum_notional
+        self._totals[side] = cum_size[-1] if cum_size else 0.0
+        self._updates[side] = 0
+
+    def _set_level(self, side: str, price: float, size: float) -> None:
+        levels = self._levels(side)
+        keys = self._keys[side]
+        key = -price if side == BIDS else price
+        old = levels.get(price)
+        if old is None and size <= 0:
+            return
+        index = bisect_left(keys, key)
+        if size <= 0:
+            del levels[price]
+            del keys[index]
+            self._totals[side] -= old
+        else:
+            if old is None:
+                keys.insert(index, key)
+                old = 0.0
+            levels[price] = size
+            self._totals[side] += size - old
+        self._updates[side] += 1
+        if not keys:
+            self._totals[side] = 0.0
+        elif self._updates[side] >= REBASE_INTERVAL:
+            self._totals[side] = math.fsum(levels.values())
+            self._updates[side] = 0
+        # cumulative values from the changed level down are stale
+        del self._cum_size[side][index:]
+        del self._cum_notional[side][index:]
+
+    def _cumulative(self,
+                    side: str,
+                    levels: Optional[int] = None,
+                    size: Optional[float] = None) -> Tuple[List[float],
+                                                           List[float]]:
+        """
+        Extend the cumulative size and notional of a side until ``levels``
+        levels are covered or the cumulative size reaches ``size``
+        """
+        keys = self._keys[side]
+        book = self._levels(side)
+        cum_size = self._cum_size[side]
+        cum_notional = self._cum_notional[side]
+        stop = len(keys) if levels is None else min(levels, len(keys))
+        total = cum_size[-1] if cum_size else 0.0
+        notional = cum_notional[-1] if cum_notional else 0.0
+        for key in keys[len(cum_size):stop]:
+            if size is not None and total >= size:
+                break
+            price = abs(key)
+            total += book[price]
+            notional += price * book[price]
+            cum_size.append(total)
+            cum_notional.append(notional)
+        return cum_size, cum_notional
+
+    def best_bid(self) -> Optional[Tuple[float, float]]:
+        """
+        The best bid as (price, size), None if there are no bids
+        """
+        if not self._keys[BIDS]:
+            return None
+        price = -self._keys[BIDS][0]
+        return price, self.bids[price]
+
+    def best_ask(self) -> Optional[Tuple[float, float]]:
+        """
+        The best ask as (price, size), None if there are no asks
+        """
+        if not self._keys[ASKS]:
+            return None
+        price = self._keys[ASKS][0]
+        return price, self.asks[price]
+
+    def mid(self) -> Optional[float]:
+        bid, ask = self.best_bid(), self.best_ask()
+        if bid is None or ask is None:
+            return None
+        return (bid[0] + ask[0]) / 2
+
+    def spread(self) -> Optional[float]:
+        bid, ask = self.best_bid(), self.best_ask()
+        if bid is None or ask is None:
+            return None
+        return ask[0] - bid[0]
+
+    def microprice(self) -> Optional[float]:
+        """
+        Mid price weighted by the size on the opposite side of the top level
+        """
+        bid, ask = self.best_bid(), self.best_ask()
+        if bid is None or ask is None:
+            return None
+        return (bid[0] * ask[1] + ask[0] * bid[1]) / (bid[1] + ask[1])
+
+    def imbalance(self, levels: Optional[int] = None) -> Optional[float]:
+        """
+        (bid size - ask size) / (bid size + ask size), between -1 and 1
+
+        :param levels: number of levels per side to include, None for the
+            whole book
+        :return: the imbalance, None if the book is empty
+        """
+        if levels is None:
+            bid_size, ask_size = self._totals[BIDS], self._totals[ASKS]
+        else:
+            bid_size, ask_size = (self._depth_at(side, levels)
+                                  for side in (BIDS, ASKS))
+        if bid_size + ask_size <= 0:
+            return None
+        return (bid_size - ask_size) / (bid_size + ask_size)
+
+    def _depth_at(self, side: str, levels: int) -> float:
+        if levels <= 0:
+            return 0.0
+        levels = min(levels, len(self._keys[side]))
+        if levels == 0:
+            return 0.0
+        cum_size, _ = self._cumulative(side, levels)
+        return cum_size[levels - 1]
+
+    def total_size(self, side: str) -> float:
+        """
+        Total size on a side of the book
+        """
+        return self._totals[side]
+
+    def depth(self,
+              side: str,
+              levels: Optional[int] = None) -> List[Tuple[float, float]]:
+        """
+        Cumulative depth curve, best level first
+
+        :param side: 'bids' or 'asks'
+        :param levels: number of levels to include, None for the whole side
+        :return: list of (price, cumulative size)
+        """
+        cum_size, _ = self._cumulative(side, levels)
+        prices = (abs(key) for key in self._keys[side])
+        return list(zip(prices, cum_size[:levels]))
+
+    def vwap(self, side: str, size: float) -> Optional[float]:
+        """
+        Average price to fill ``size`` against a side of the book,
+        e.g. ``vwap('asks', 1)`` for a 1 unit market buy
+
+        :param side: the side that is taken, 'bids' or 'asks'
+        :param size: the size to fill
+        :return: the average fill price, None if the side is too thin
+        """
+        if size <= 0:
+            return None
+        cum_size, cum_notional = self._cumulative(side, size=size)
+        index = bisect_left(cum_size, size)
+        if index == len(cum_size):
+            return None
+        filled = cum_size[index - 1] if index else 0.0
+        notional = cum_notional[index - 1] if index else 0.0
+        price = abs(self._keys[side][index])
+        return (notional + (size - filled) * price) / size
@@ -0,0 +1,98 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from requests.exceptions import Timeout
+
+
+class _Call:
+    """
+    A request in flight, shared by every caller waiting on the same key
+    """
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into a single call
+
+    The first caller for a key runs the function, callers arriving while it is
+    in flight wait and receive the same result (or exception). With a ttl > 0
+    successful results are also reused for ttl seconds after they return.
+    Results are shared, not copied, so callers must not mutate them.
+    """
+    def __init__(self, ttl: float = 0.0):
+        """
+        :param ttl: seconds a successful result stays reusable, 0 to disable
+        """
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._results: Dict[Hashable, Tuple[float, Any]] = {}
+
+    def do(self,
+           key: Hashable,
+           fn: Callable[[], Any],
+           timeout: Optional[float] = None) -> Any:
+        """
+        Run fn, or join an identical call already in flight
+
+        :param key: identifies identical calls
+        :param fn: the call to make
+        :param timeout: seconds to wait when joining a call in flight,
+            None to wait until it returns
+        :return: the result of fn
+        """
+        with self._lock:
+            if self.ttl > 0:
+                cached = self._results.get(key)
+                if cached is not None:
+                    if cached[0] > time.monotonic():
+                        return cached[1]
+                    del self._results[key]
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            if not call.done.wait(timeout):
+                raise Timeout(f'deadline of {timeout}s exceeded')
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                if call.error is None and self.ttl > 0:
+                    now = time.monotonic()
+                    self._sweep(now)
+                    self._results[key] = (now + self.ttl, call.result)
+            call.done.set()
+        return call.result
+
+    def _sweep(self, now: float) -> None:
+        """
+        Drop expired results, keys that are never requested again (e.g. paged
+        time ranges) would otherwise be kept forever. Called with the lock held.
+        """
+        expired = [k for k, (expires, _) in self._results.items()
+                   if expires <= now]
+        for key in expired:
+            del self._results[key]
+
+    def clear(self) -> None:
+        """
+        Drop all cached results, calls in flight are not affected
+        """
+        with self._lock:
+            self._results.clear()
@@ -0,0 +1,155 @@
+import threading
+import time
+
+import pytest
+from requests.exceptions import Timeout
+
+from ftx.api import FtxClient
+from ftx.hedge import Hedger, LatencyTracker
+from ftx.singleflight import SingleFlight
+
+
+class FakeResponse:
+    def __init__(self, result):
+        self._result = result
+
+    def json(self):
+        return {'success': True, 'result': self._result}
+
+
+def warm_up(hedger: Hedger, key, seconds=0.01):
+    for _ in range(hedger.latency.min_samples):
+        hedger.latency.record(key, seconds)
+
+
+def test_no_delay_before_min_samples():
+    tracker = LatencyTracker(90, min_samples=5)
+    for _ in range(4):
+        tracker.record('key', 0.1)
+    assert tracker.delay('key') is None
+    tracker.record('key', 0.1)
+    assert tracker.delay('key') == 0.1
+
+
+def test_no_hedge_before_min_samples():
+    hedger = Hedger(90)
+    calls = []
+
+    def fn(remaining):
+        calls.append(threading.current_thread())
+        time.sleep(0.05)
+        return 'result'
+
+    assert hedger.call('key', fn, timeout=1) == 'result'
+    assert calls == [threading.current_thread()]
+
+
+def test_hedge_after_percentile_and_fastest_wins():
+    hedger = Hedger(90)
+    warm_up(hedger, 'key', 0.02)
+    calls = []
+
+    def fn(remaining):
+        calls.append(1)
+        attempt = len(calls)
+        time.sleep(1 if attempt == 1 else 0.01)
+        return attempt
+
+    start = time.monotonic()
+    assert hedger.call('key', fn, timeout=2) == 2
+    assert time.monotonic() - start < 0.5
+    assert len(calls) == 2
+    hedger.close()
+
+
+def test_timeout_at_deadline():
+    hedger = Hedger(90)
+    warm_up(hedger, 'key')
+    start = time.monotonic()
+    with pytest.raises(Timeout):
+        hedger.call('key', lambda remaining: time.sleep(1), timeout=0.2)
+    assert time.monotonic() - start < 0.5
+    hedger.close()
+
+
+def test_busy_pool_runs_on_calling_thread():
+    hedger = Hedger(90, max_workers=2)
+    warm_up(hedger, 'hung')
+    warm_up(hedger, 'other')
+    release = threading.Event()
+    for _ in range(2):
+        threading.Thread(target=hedger.call,
+                         args=('hung', lambda r: release.wait(), 5),
+                         daemon=True).start()
+    time.sleep(0.1)
+    threads = []
+
+    def fn(remaining):
+        threads.append(threading.current_thread())
+        return 'result'
+
+    assert hedger.call('other', fn, timeout=1) == 'result'
+    assert threads == [threading.current_thread()]
+    release.set()
+    hedger.close()
+
+
+def test_follower_timeout_when_joining_call_in_flight():
+    flight = SingleFlight()
+    threading.Thread(target=flight.do,
+                     args=('key', lambda: time.sleep(1))).start()
+    time.sleep(0.05)
+    start = time.monotonic()
+    with pytest.raises(Timeout):
+        flight.do('key', lambda: None, timeout=0.1)
+    assert time.monotonic() - start < 0.5
+
+
+def test_hedge_percentile_requires_timeout():
+    with pytest.raises(AssertionError):
+        FtxClient(hedge_percentile=95)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    client = FtxClient(api_key='key', api_secret='secret', timeout=1,
+                       endpoint_timeouts={'markets/*': 2,
+                                          'markets/*/orderbook': 0.5},
+                       hedge_percentile=95)
+    hedged, sent = [], []
+
+    def call(key, fn, timeout=None):
+        hedged.append(key)
+        return fn(timeout)
+
+    def send(request, timeout=None):
+        sent.append((request.method, request.path_url, timeout))
+        return FakeResponse({})
+
+    monkeypatch.setattr(client._hedger, 'call', call)
+    monkeypatch.setattr(client._session, 'send', send)
+    client.hedged, client.sent = hedged, sent
+    return client
+
+
+def test_only_reads_are_hedged(client):
+    client.get_market('BTC/USD')
+    client.get_orderbook('BTC/USD')
+    client.get_positions()
+    assert len(client.hedged) == 3
+    client.place_order('BTC/USD', 'buy', 1, 1)
+    client.modify_order(1, price=2)
+    client.cancel_order(1)
+    client.cancel_orders()
+    assert len(client.hedged) == 3
+    assert [m for m, _, _ in client.sent] == ['GET'] * 3 + \
+        ['POST', 'POST', 'DELETE', 'DELETE']
+
+
+def test_timeouts(client):
+    client.get_orderbook('BTC/USD')
+    client.get_market('BTC/USD')
+    client.get_positions()
+    client.place_order('BTC/USD', 'buy', 1, 1, timeout=0.3)
+    client.cancel_order(1, timeout=0.4)
+    assert [t for _, _, t in client.sent] == [0.5, 2, 1, 0.3, 0.4]
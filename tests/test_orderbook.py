@@ -0,0 +1,77 @@
+import random
+
+import pytest
+
+from ftx.orderbook import OrderBook
+
+
+def rebuild(book: OrderBook) -> OrderBook:
+    return OrderBook({
+        'bids': [[p, s] for p, s in book.bids.items()],
+        'asks': [[p, s] for p, s in book.asks.items()],
+    })
+
+
+def assert_same(book: OrderBook, reference: OrderBook) -> None:
+    assert book.best_bid() == reference.best_bid()
+    assert book.best_ask() == reference.best_ask()
+    assert book.microprice() == pytest.approx(reference.microprice())
+    for levels in (None, 1, 3, 10, 100):
+        assert book.imbalance(levels) == pytest.approx(
+            reference.imbalance(levels))
+    for side in ('bids', 'asks'):
+        for levels in (1, 5, None):
+            assert book.depth(side, levels) == pytest.approx(
+                reference.depth(side, levels))
+        for size in (0.5, 5.0, 40.0, 1000.0):
+            assert book.vwap(side, size) == pytest.approx(
+                reference.vwap(side, size))
+
+
+def test_imbalance_levels():
+    book = OrderBook({'bids': [[100, 1], [99, 10]],
+                      'asks': [[101, 5], [102, 1]]})
+    assert book.imbalance(1) == pytest.approx(-2 / 3)
+    assert book.imbalance() == pytest.approx(5 / 17)
+    assert book.microprice() == pytest.approx((100 * 5 + 101 * 1) / 6)
+    assert book.vwap('asks', 6) == pytest.approx((101 * 5 + 102) / 6)
+    assert book.vwap('asks', 7) is None
+
+
+def test_updates_match_rebuild():
+    rng = random.Random(0)
+    book = OrderBook()
+    book.apply({
+        'action': 'partial',
+        'bids': [[100 - i * 0.5, rng.random() * 3] for i in range(30)],
+        'asks': [[100.5 + i * 0.5, rng.random() * 3] for i in range(30)],
+    })
+    assert_same(book, rebuild(book))
+    for _ in range(500):
+        side = rng.choice(['bids', 'asks'])
+        price = 100 - rng.randint(0, 40) * 0.5 if side == 'bids' \
+            else 100.5 + rng.randint(0, 40) * 0.5
+        size = rng.choice([0, 0, rng.random() * 3])
+        book.apply({'action': 'update', side: [[price, size]]})
+        assert_same(book, rebuild(book))
+
+
+def test_emptied_side_has_no_size():
+    book = OrderBook({'bids': [[1, 0.1], [2, 0.2]]})
+    book.update({'bids': [[1, 0], [2, 0]]})
+    assert book.total_size('bids') == 0
+    assert book.imbalance() is None
+
+
+def test_totals_do_not_drift():
+    rng = random.Random(1)
+    book = OrderBook()
+    for _ in range(20000):
+        price = rng.randint(1, 50) / 10
+        book.update({'bids': [[price, rng.choice([0, rng.random()])]]})
+    book.update({'bids': [[price, 0] for price in list(book.bids)],
+                 'asks': [[1, 0.3]]})
+    assert book.total_size('bids') == 0
+    assert book.imbalance() == -1.0
+    book.update({'asks': [[1, 0.5], [2, 0.1], [2, 0.2], [3, 0.7]]})
+    assert book.imbalance() == pytest.approx(book.imbalance(len(book.asks)))
@@ -0,0 +1,120 @@
+import threading
+import time
+
+import pytest
+
+from ftx.api import FtxClient
+from ftx.singleflight import SingleFlight
+
+
+class FakeResponse:
+    def __init__(self, result):
+        self._result = result
+
+    def json(self):
+        return {'success': True, 'result': self._result}
+
+
+def run_concurrently(fn, count):
+    results, errors = [], []
+
+    def target():
+        try:
+            results.append(fn())
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=target) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+
+def test_concurrent_calls_share_one_call():
+    flight = SingleFlight()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        time.sleep(0.1)
+        return 'result'
+
+    results, errors = run_concurrently(lambda: flight.do('key', fn), 8)
+    assert calls == [1]
+    assert results == ['result'] * 8
+    assert not errors
+
+
+def test_error_reaches_every_caller():
+    flight = SingleFlight()
+
+    def fn():
+        time.sleep(0.1)
+        raise ValueError('boom')
+
+    results, errors = run_concurrently(lambda: flight.do('key', fn), 5)
+    assert not results
+    assert len(errors) == 5
+    assert all(isinstance(e, ValueError) for e in errors)
+
+
+def test_results_reused_within_ttl():
+    flight = SingleFlight(ttl=0.1)
+    calls = []
+
+    def fn():
+        calls.append(1)
+        return len(calls)
+
+    assert flight.do('key', fn) == 1
+    assert flight.do('key', fn) == 1
+    time.sleep(0.15)
+    assert flight.do('key', fn) == 2
+
+
+def test_expired_results_swept_on_store():
+    flight = SingleFlight(ttl=0.05)
+    for end_time in range(100):
+        flight.do(('trades', end_time), lambda: end_time)
+    time.sleep(0.1)
+    flight.do('other', lambda: None)
+    assert list(flight._results) == ['other']
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # a long ttl makes sequential calls observe the coalescing key
+    client = FtxClient(coalesce_reads=True, coalesce_ttl=60)
+    sent = []
+
+    def send(request, **kwargs):
+        sent.append(request)
+        time.sleep(0.05)
+        return FakeResponse(request.url)
+
+    monkeypatch.setattr(client._session, 'send', send)
+    client.sent = sent
+    return client
+
+
+def test_client_coalesces_identical_gets(client):
+    results, _ = run_concurrently(lambda: client.get_market('BTC/USD'), 5)
+    assert client.get_market('BTC/USD') == results[0]
+    assert len(client.sent) == 1
+    assert len(set(results)) == 1
+
+
+def test_client_keeps_different_params_apart(client):
+    client.get_orderbook('BTC/USD', 1)
+    client.get_orderbook('BTC/USD', 20)
+    client.get_orderbook('BTC/USD', 1)
+    assert len(client.sent) == 2
+
+
+def test_client_keeps_subaccounts_apart(client):
+    for subaccount in ('a', 'b', 'a'):
+        client._subaccount_name = subaccount
+        client.get_market('BTC/USD')
+    assert len(client.sent) == 2